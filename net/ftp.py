@@ -24,20 +24,31 @@ from StringIO import StringIO
 
 
 class FtpClient():
-  def __init__(self, host='', user='', passwd=''):
+  def __init__(self, host='', user='', passwd='', port=21):
     self.logger = logging.getLogger('FtpClient')
     self.host = host
     self.user = user
     self.passwd = passwd
+    self.port = port
+    self.ftp = None
   
   def connect(self):
-    self.logger.info('Connecting to %s' % self.host)
-    self.ftp = FTP(self.host, self.user, self.passwd)
+    self.logger.info('Connecting to %s:%d' % (self.host, self.port))
+    ftp = FTP()
+    ftp.connect(self.host, self.port)
+    self.ftp = ftp
+    self.ftp.login(self.user, self.passwd)
     self.logger.debug(self.ftp.getwelcome())
 
+  def destination(self):
+    return 'ftp://%s:%d' % (self.host, self.port)
+
   def write_file(self, filename, fp):
     return self.ftp.storbinary('STOR %s' % filename, StringIO(fp.read()))
     
   def disconnect(self):
+    if self.ftp is None:
+      return
     self.logger.info('Disconnecting from %s' % self.ftp.host)
     self.ftp.close()
+    self.ftp = None
@@ -39,11 +39,15 @@ class S3Client():
     self.logger = logging.getLogger('S3Client')
     self.access_key_id = access_key_id
     self.secret_access_key = secret_access_key
+    self.conn = None
     
   def connect(self):
     self.conn = boto.connect_s3(self.access_key_id, self.secret_access_key)
     self.logger.info('Connected to %s' % self.conn.host)
 
+  def destination(self, bucket_name):
+    return 's3://%s' % bucket_name
+
   def create_bucket(self, bucket_name, lifecycle=DEFAULT_LIFECYCLE):
     bucket = self.conn.create_bucket(bucket_name)
     bucket.configure_lifecycle(lifecycle)
@@ -63,5 +67,8 @@ class S3Client():
       key.set_metadata(k, v)
   
   def disconnect(self):
+    if self.conn is None:
+      return
     self.logger.info('Disconnecting from %s' % self.conn.host)
-    self.conn.close()
\ No newline at end of file
+    self.conn.close()
+    self.conn = None
\ No newline at end of file
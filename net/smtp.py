@@ -30,6 +30,7 @@ class SmtpClient():
     self.port = port
     self.username = username
     self.password = password
+    self.smtp = None
 
   def connect(self):
     self.logger.info('Connecting to %s:%d' % (self.host, self.port))
@@ -37,6 +38,9 @@ class SmtpClient():
     self.smtp.starttls()
     self.smtp.login(self.username, self.password)
     
+  def destination(self):
+    return 'smtp://%s:%d' % (self.host, self.port)
+    
   def send_message(self, from_addr, to_addrs, message, subject=''):
     mime_text = MIMEText(message)
     mime_text['Subject'] = subject
@@ -44,8 +48,11 @@ class SmtpClient():
     self.smtp.sendmail(from_addr, to_addrs, mime_text.as_string())
     
   def disconnect(self):
+    if self.smtp is None:
+      return
     self.logger.info('Disconnecting from %s:%d', self.host, self.port)
     self.smtp.quit()
+    self.smtp = None
     
 if __name__ == '__main__':
   smtp_client = SmtpClient('smtp.gmail.com', 587, username='tfbeatty', password='R@ckC1ty!')
@@ -21,6 +21,7 @@
 import logging
 import traceback
 
+from system.breaker import CircuitOpenError, DEFAULT_CIRCUIT_BREAKER_REGISTRY
 from system.retry import retries
 
 
@@ -42,22 +43,27 @@ class RetryingActivity(Activity):
     logger.warn('Caught exception - %s - %d tries remaining - delaying %d seconds' % 
         (ex, tries_remaining, delay_sec))
    
-  @retries(3, exceptions=(Exception,), hook=log_retry)
+  @retries(3, exceptions=(Exception,), fatal=(CircuitOpenError,), hook=log_retry)
   def start(self):
     return self.delegate.start()
 
 class DeliveryActivity(Activity):
-  def __init__(self, data_source, writer, metadata={}):
+  def __init__(self, data_source, writer, metadata={}, 
+               circuit_breakers=DEFAULT_CIRCUIT_BREAKER_REGISTRY):
     Activity.__init__(self, metadata)
     self.logger = logging.getLogger('DeliveryActivity')
     self.data_source = data_source
     self.writer = writer
+    self.circuit_breakers = circuit_breakers
   
   def start(self):
+    destination = getattr(self.writer, 'destination', None)
+    if destination is not None:
+      destination = destination(self.metadata)
     self.logger.info('Reading data')
     reader = self.data_source.get_reader()
     self.logger.info('Writing data') 
-    self.writer.write(reader, self.metadata)
+    self.circuit_breakers.call(destination, self.writer.write, reader, self.metadata)
 
 class ActivitySuccessHandler():
   def __init__(self):
@@ -77,37 +83,57 @@ DEFAULT_ACTIVITY_SUCCESS_HANDLER = ActivitySuccessHandler()
 DEFAULT_ACTIVITY_FAILURE_HANDLER = ActivityFailureHandler()
 
 class EmailNotifyingActivitySuccessHandler(ActivitySuccessHandler):
-  def __init__(self, smtp_client, from_addr, to_addrs, subject='Success notification'):
+  def __init__(self, smtp_client, from_addr, to_addrs, subject='Success notification', 
+               circuit_breakers=DEFAULT_CIRCUIT_BREAKER_REGISTRY):
     self.logger = logging.getLogger('EmailNotifyingActivitySuccessHandler')
     self.smtp_client = smtp_client
     self.from_addr = from_addr
     self.to_addrs = to_addrs
     self.subject = subject
+    self.circuit_breakers = circuit_breakers
     
   def handle_success(self, metadata):
     self.logger.info('Sending success notification email')
+    try:
+      self.circuit_breakers.call(self.smtp_client.destination(), self.send_message, 
+          'Success message\n\nMetadata: %s' % metadata)
+    except CircuitOpenError as ex:
+      if ex.opened:
+        raise
+      self.logger.warn('Skipping success notification email - %s' % ex)
+  
+  def send_message(self, message):
     try:
       self.smtp_client.connect()
-      self.smtp_client.send_message(self.from_addr, self.to_addrs, 
-          'Success message\n\nMetadata: %s' % metadata, self.subject)
+      self.smtp_client.send_message(self.from_addr, self.to_addrs, message, self.subject)
     finally:
       self.smtp_client.disconnect()
     
 class EmailNotifyingActivityFailureHandler(ActivityFailureHandler):
-  def __init__(self, smtp_client, from_addr, to_addrs, subject='Failure notification'):
+  def __init__(self, smtp_client, from_addr, to_addrs, subject='Failure notification', 
+               circuit_breakers=DEFAULT_CIRCUIT_BREAKER_REGISTRY):
     self.logger = logging.getLogger('EmailNotifyingActivityFailureHandler')
     self.smtp_client = smtp_client
     self.from_addr = from_addr
     self.to_addrs = to_addrs
     self.subject = subject
+    self.circuit_breakers = circuit_breakers
     
   def handle_failure(self, ex, metadata):
     self.logger.info('Sending failure notification email')
+    message = 'Failure message\n\nException: %s:%s\nStack trace: %s\nMetadata: %s' % \
+        (type(ex), ex, traceback.format_exc(ex), metadata)
+    try:
+      self.circuit_breakers.call(self.smtp_client.destination(), self.send_message, message)
+    except CircuitOpenError as open_ex:
+      if open_ex.opened:
+        raise
+      self.logger.warn('Skipping failure notification email - %s' % open_ex)
+  
+  def send_message(self, message):
     try:
       self.smtp_client.connect()
-      self.smtp_client.send_message(self.from_addr, self.to_addrs, 
-          'Failure message\n\nException: %s:%s\nStack trace: %s\nMetadata: %s' % 
-          (type(ex), ex, traceback.format_exc(ex), metadata), self.subject)
+      self.smtp_client.send_message(self.from_addr, self.to_addrs, message, self.subject)
     finally:
       self.smtp_client.disconnect()
 
@@ -122,6 +148,13 @@ class ActivityRunner():
   def run(self):
     try:
       self.activity.start()
+    except CircuitOpenError as ex:
+      if ex.opened:
+        self.logger.exception(ex)
+        self.failure_handler.handle_failure(ex, self.activity.metadata)
+      else:
+        # Only the failure that opened the circuit is handled
+        self.logger.warn('Skipping activity - %s' % ex)
     except Exception as ex:
       self.logger.exception(ex)
       self.failure_handler.handle_failure(ex, self.activity.metadata)
@@ -0,0 +1,169 @@
+# Copyright (C) 2013, Tim Beatty
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import ftplib
+import logging
+import smtplib
+import socket
+import sys
+import threading
+import time
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Errors raised by the ftp and smtp clients when a destination is unreachable or 
+# temporarily unavailable. Permanent errors such as an ftp 550 or a refused 
+# recipient are caused by the request, not the destination, and are not included.
+DESTINATION_ERRORS = (socket.error, EOFError, ftplib.error_temp, smtplib.SMTPConnectError, 
+                      smtplib.SMTPServerDisconnected)
+try:
+  from boto.exception import BotoServerError
+except ImportError:
+  BotoServerError = None
+
+def is_destination_error(ex):
+  if isinstance(ex, DESTINATION_ERRORS):
+    return True
+  return BotoServerError is not None and isinstance(ex, BotoServerError) and ex.status >= 500
+
+class CircuitOpenError(Exception):
+  def __init__(self, destination, cause=None, opened=False):
+    if opened:
+      message = 'Circuit opened for %s - %s' % (destination, cause)
+    elif cause is None:
+      message = 'Circuit open for %s' % destination
+    else:
+      message = 'Circuit open for %s - %s' % (destination, cause)
+    Exception.__init__(self, message)
+    self.destination = destination
+    self.cause = cause
+    self.opened = opened
+
+class CircuitBreaker():
+  """Fails fast on calls to a destination that keeps failing.
+
+  Only exceptions for which is_failure returns True count as failures of the
+  destination; anything else passes through without changing the state of
+  the circuit. After failure_threshold consecutive failures the circuit opens
+  and calls raise CircuitOpenError without being attempted. The failure that
+  opens the circuit is raised as a CircuitOpenError with opened set, keeping
+  the traceback of the failure. Once reset_timeout seconds have passed a
+  single probe call is let through (half-open); its success closes the
+  circuit and its failure opens it again.
+  """
+  def __init__(self, destination, failure_threshold=5, reset_timeout=60, 
+               is_failure=is_destination_error, clock=time.time):
+    self.logger = logging.getLogger('CircuitBreaker')
+    self.destination = destination
+    self.failure_threshold = failure_threshold
+    self.reset_timeout = reset_timeout
+    self.is_failure = is_failure
+    self.clock = clock
+    self.lock = threading.Lock()
+    self.state = CLOSED
+    self.failures = 0
+    self.opened_at = None
+
+  def call(self, func, *args, **kwargs):
+    probe = self.before_call()
+    try:
+      result = func(*args, **kwargs)
+    except BaseException:
+      ex_type, ex, tb = sys.exc_info()
+      if not (isinstance(ex, Exception) and self.is_failure(ex)):
+        if probe:
+          self.release_probe()
+        raise ex_type, ex, tb
+      previous, current = self.record_failure(ex, probe)
+      if current == CLOSED:
+        raise ex_type, ex, tb
+      raise CircuitOpenError(self.destination, ex, opened=(previous == CLOSED)), None, tb
+    else:
+      self.record_success()
+      return result
+
+  def before_call(self):
+    with self.lock:
+      if self.state == CLOSED:
+        return False
+      if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+        self.logger.info('Probing %s' % self.destination)
+        self.state = HALF_OPEN
+        return True
+      raise CircuitOpenError(self.destination)
+
+  def release_probe(self):
+    with self.lock:
+      if self.state == HALF_OPEN:
+        self.state = OPEN
+
+  def record_success(self):
+    with self.lock:
+      if self.state != CLOSED:
+        self.logger.info('Closing circuit for %s' % self.destination)
+      self.state = CLOSED
+      self.failures = 0
+      self.opened_at = None
+
+  def record_failure(self, ex, probe=False):
+    with self.lock:
+      previous = self.state
+      if probe:
+        self.state = OPEN
+        self.opened_at = self.clock()
+      elif self.state == CLOSED:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+          self.logger.warn('Opening circuit for %s after %d failures - %s' %
+              (self.destination, self.failures, ex))
+          self.state = OPEN
+          self.opened_at = self.clock()
+      return previous, self.state
+
+class CircuitBreakerRegistry():
+  """Process-wide collection of circuit breakers keyed by destination."""
+  def __init__(self, failure_threshold=5, reset_timeout=60, is_failure=is_destination_error, 
+               clock=time.time):
+    self.failure_threshold = failure_threshold
+    self.reset_timeout = reset_timeout
+    self.is_failure = is_failure
+    self.clock = clock
+    self.lock = threading.Lock()
+    self.breakers = {}
+
+  def get(self, destination):
+    with self.lock:
+      breaker = self.breakers.get(destination)
+      if breaker is None:
+        breaker = CircuitBreaker(destination, self.failure_threshold, 
+            self.reset_timeout, self.is_failure, self.clock)
+        self.breakers[destination] = breaker
+      return breaker
+
+  def call(self, destination, func, *args, **kwargs):
+    if destination is None:
+      return func(*args, **kwargs)
+    return self.get(destination).call(func, *args, **kwargs)
+
+DEFAULT_CIRCUIT_BREAKER_REGISTRY = CircuitBreakerRegistry()
@@ -33,12 +33,13 @@ def example_exc_handler(tries_remaining, exception, delay):
     print >> sys.stderr, "Caught '%s', %d tries remaining, sleeping for %s seconds" % (exception, tries_remaining, delay)
 
 
-def retries(max_tries, delay=1, backoff=2, exceptions=(Exception,), hook=None):
+def retries(max_tries, delay=1, backoff=2, exceptions=(Exception,), fatal=(), hook=None):
     """Function decorator implementing retrying logic.
 
     delay: Sleep this many seconds * backoff * try number after failure
     backoff: Multiply delay by this factor after each failure
     exceptions: A tuple of exception classes; default (Exception,)
+    fatal: A tuple of exception classes which are never retried; default ()
     hook: A function with the signature myhook(tries_remaining, exception);
           default None
 
@@ -49,7 +50,8 @@ def retries(max_tries, delay=1, backoff=2, exceptions=(Exception,), hook=None):
     This will recover after all but the most fatal errors. You may specify a
     custom tuple of exception classes with the 'exceptions' argument; the
     function will only be retried if it raises one of the specified
-    exceptions.
+    exceptions. Exceptions in the 'fatal' tuple are raised immediately even
+    if they are also covered by 'exceptions'.
 
     Additionally you may specify a hook function which will be called prior
     to retrying with the number of remaining tries and the exception instance;
@@ -64,6 +66,8 @@ def retries(max_tries, delay=1, backoff=2, exceptions=(Exception,), hook=None):
             for tries_remaining in tries:
                 try:
                    return func(*args, **kwargs)
+                except fatal:
+                    raise
                 except exceptions as e:
                     if tries_remaining > 0:
                         if hook is not None:
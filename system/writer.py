@@ -23,6 +23,9 @@ import logging
 class FileWriter:
   def write(self, fp, metadata):
     pass
+  
+  def destination(self, metadata):
+    return None
 
 class FtpFileWriter(FileWriter):
   def __init__(self, ftp_client):
@@ -37,6 +40,9 @@ class FtpFileWriter(FileWriter):
       self.ftp_client.write_file(filename, fp)
     finally:
       self.ftp_client.disconnect()
+  
+  def destination(self, metadata):
+    return self.ftp_client.destination()
     
 class S3FileWriter(FileWriter):
   def __init__(self, s3_client):
@@ -57,3 +63,6 @@ class S3FileWriter(FileWriter):
       self.s3_client.write_key(bucket, key_name, fp, metadata)
     finally:
       self.s3_client.disconnect()
+  
+  def destination(self, metadata):
+    return self.s3_client.destination(metadata['bucket'])
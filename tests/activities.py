@@ -19,11 +19,17 @@
 # SOFTWARE.
 
 import logging
+import socket
 import unittest
 
-from mockito import any, mock, verify, when
+from mockito import any, mock, verify, when, unstub
 
-from system.activity import RetryingActivity, ActivityRunner, DeliveryActivity
+from net.smtp import SmtpClient
+from system.activity import RetryingActivity, ActivityRunner, DeliveryActivity, \
+  EmailNotifyingActivitySuccessHandler, EmailNotifyingActivityFailureHandler
+from system.breaker import CircuitBreakerRegistry, CircuitOpenError, CLOSED, OPEN
+import system.retry
+from tests import refused_port
 
 
 class ActivityTests(unittest.TestCase):
@@ -75,4 +81,98 @@ class ActivityTests(unittest.TestCase):
     ActivityRunner(activity, mock_success_handler, mock_failure_handler).run()
     verify(mock_success_handler, times=0).handle_success(any())
     verify(mock_failure_handler).handle_failure(any(), any())
+
+  def testActivityRunnerCircuitOpen(self):
+    mock_writer = mock()
+    when(mock_writer).destination(any()).thenReturn('ftp://partner')
+    when(mock_writer).write(any(), any()).thenRaise(socket.error('Simulated exception'))
+    registry = CircuitBreakerRegistry(failure_threshold=2)
+    activity = DeliveryActivity(mock(), mock_writer, {}, registry)
+    mock_success_handler = mock()
+    mock_failure_handler = mock()
+    for _ in range(5):
+      ActivityRunner(activity, mock_success_handler, mock_failure_handler).run()
+    verify(mock_writer, times=2).write(any(), any())
+    verify(mock_success_handler, times=0).handle_success(any())
+    verify(mock_failure_handler, times=1).handle_failure(any(socket.error), any())
+    verify(mock_failure_handler, times=1).handle_failure(any(CircuitOpenError), any())
+    
+  def testActivityRunnerDataSourceFailureDoesNotOpenCircuit(self):
+    mock_writer = mock()
+    when(mock_writer).destination(any()).thenReturn('ftp://partner')
+    mock_data_source = mock()
+    when(mock_data_source).get_reader().thenRaise(IOError('Simulated exception')) \
+      .thenRaise(IOError('Simulated exception')).thenReturn(mock())
+    registry = CircuitBreakerRegistry(failure_threshold=2)
+    activity = DeliveryActivity(mock_data_source, mock_writer, {}, registry)
+    mock_success_handler = mock()
+    mock_failure_handler = mock()
+    for _ in range(4):
+      ActivityRunner(activity, mock_success_handler, mock_failure_handler).run()
+    self.assertEqual(CLOSED, registry.get('ftp://partner').state)
+    verify(mock_writer, times=2).write(any(), any())
+    verify(mock_success_handler, times=2).handle_success(any())
+    verify(mock_failure_handler, times=2).handle_failure(any(IOError), any())
+    
+  def testRetryingActivityCircuitOpen(self):
+    mock_delegate = mock()
+    when(mock_delegate).start().thenRaise(CircuitOpenError('ftp://partner'))
+    activity = RetryingActivity(mock_delegate)
+    self.assertRaises(CircuitOpenError, activity.start)
+    verify(mock_delegate, times=1).start()
+    
+  def testRetryingActivityOpensCircuit(self):
+    mock_writer = mock()
+    when(mock_writer).destination(any()).thenReturn('ftp://partner')
+    when(mock_writer).write(any(), any()).thenRaise(socket.error('Simulated exception'))
+    registry = CircuitBreakerRegistry(failure_threshold=2)
+    activity = RetryingActivity(DeliveryActivity(mock(), mock_writer, {}, registry))
+    mock_failure_handler = mock()
+    when(system.retry).sleep(any()).thenReturn(None)
+    try:
+      ActivityRunner(activity, mock(), mock_failure_handler).run()
+    finally:
+      unstub(system.retry)
+    verify(mock_writer, times=2).write(any(), any())
+    verify(mock_failure_handler).handle_failure(any(CircuitOpenError), any())
+    
+  def testEmailNotifyingSuccessHandler(self):
+    mock_smtp_client = mock()
+    when(mock_smtp_client).destination().thenReturn('smtp://relay:25')
+    registry = CircuitBreakerRegistry()
+    handler = EmailNotifyingActivitySuccessHandler(mock_smtp_client, 'from', 'to', 
+        circuit_breakers=registry)
+    handler.handle_success({})
+    verify(mock_smtp_client).connect()
+    verify(mock_smtp_client).send_message('from', 'to', any(), 'Success notification')
+    verify(mock_smtp_client).disconnect()
+    self.assertEqual(CLOSED, registry.get('smtp://relay:25').state)
+    
+  def testDeliveryActivityWriterWithoutDestination(self):
+    class Writer:
+      def __init__(self):
+        self.written = False
+      def write(self, fp, metadata):
+        self.written = True
+    writer = Writer()
+    DeliveryActivity(mock(), writer, {}, CircuitBreakerRegistry()).start()
+    self.assertTrue(writer.written)
+    
+  def testEmailNotifyingFailureHandlerSmtpError(self):
+    smtp_client = SmtpClient('127.0.0.1', refused_port())
+    handler = EmailNotifyingActivityFailureHandler(smtp_client, 'from', 'to', 
+        circuit_breakers=CircuitBreakerRegistry())
+    self.assertRaises(socket.error, handler.handle_failure, Exception('Simulated exception'), {})
     
+  def testEmailNotifyingFailureHandlerCircuitOpen(self):
+    smtp_client = SmtpClient('127.0.0.1', refused_port())
+    registry = CircuitBreakerRegistry(failure_threshold=2)
+    handler = EmailNotifyingActivityFailureHandler(smtp_client, 'from', 'to', 
+        circuit_breakers=registry)
+    self.assertRaises(socket.error, handler.handle_failure, Exception('Simulated exception'), {})
+    self.assertRaises(CircuitOpenError, handler.handle_failure, 
+        Exception('Simulated exception'), {})
+    breaker = registry.get(smtp_client.destination())
+    self.assertEqual(OPEN, breaker.state)
+    handler.handle_failure(Exception('Simulated exception'), {})
+    self.assertEqual(2, breaker.failures)
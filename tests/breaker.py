@@ -0,0 +1,176 @@
+# Copyright (C) 2013, Tim Beatty
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in
+# the Software without restriction, including without limitation the rights to
+# use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is furnished to do
+# so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import ftplib
+import logging
+import smtplib
+import socket
+import sys
+import traceback
+import unittest
+
+from boto.exception import BotoServerError
+from mockito import mock, verify, when
+
+from system.breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, \
+  CLOSED, OPEN
+
+
+class FakeClock:
+  def __init__(self):
+    self.now = 0
+    
+  def __call__(self):
+    return self.now
+
+class CircuitBreakerTests(unittest.TestCase):
+  def setUp(self):
+    logging.basicConfig()
+    self.clock = FakeClock()
+    self.breaker = CircuitBreaker('ftp://localhost', failure_threshold=2, reset_timeout=10, 
+        clock=self.clock)
+    self.mock_destination = mock()
+    when(self.mock_destination).send().thenRaise(socket.error('Simulated exception'))
+  
+  def open_circuit(self):
+    self.assertRaises(socket.error, self.breaker.call, self.mock_destination.send)
+    try:
+      self.breaker.call(self.mock_destination.send)
+    except CircuitOpenError as ex:
+      return ex
+    self.fail('Circuit did not open')
+
+  def testOpensAfterThreshold(self):
+    ex = self.open_circuit()
+    self.assertTrue(ex.opened)
+    self.assertEqual('ftp://localhost', ex.destination)
+    self.assertTrue(isinstance(ex.cause, socket.error))
+    self.assertEqual(OPEN, self.breaker.state)
+    try:
+      self.breaker.call(self.mock_destination.send)
+      self.fail('Circuit is not open')
+    except CircuitOpenError as ex:
+      self.assertFalse(ex.opened)
+    verify(self.mock_destination, times=2).send()
+    
+  def testSuccessResetsFailures(self):
+    self.assertRaises(socket.error, self.breaker.call, self.mock_destination.send)
+    self.breaker.call(mock().send)
+    self.assertRaises(socket.error, self.breaker.call, self.mock_destination.send)
+    self.assertEqual(CLOSED, self.breaker.state)
+    
+  def testOtherErrorsDoNotCount(self):
+    mock_destination = mock()
+    when(mock_destination).send().thenRaise(KeyError('filename'))
+    for _ in range(3):
+      self.assertRaises(KeyError, self.breaker.call, mock_destination.send)
+    self.assertEqual(CLOSED, self.breaker.state)
+    self.assertEqual(0, self.breaker.failures)
+    
+  def testPermanentErrorsDoNotCount(self):
+    errors = [ftplib.error_perm('550 No such file or directory'), 
+              smtplib.SMTPRecipientsRefused({'to': (550, 'No such user')}),
+              smtplib.SMTPSenderRefused(553, 'Bad sender', 'from'),
+              BotoServerError(404, 'Not Found'), 
+              IOError('Simulated exception')]
+    for error in errors:
+      mock_destination = mock()
+      when(mock_destination).send().thenRaise(error)
+      for _ in range(3):
+        self.assertRaises(type(error), self.breaker.call, mock_destination.send)
+    self.assertEqual(CLOSED, self.breaker.state)
+    self.assertEqual(0, self.breaker.failures)
+    
+  def testTransientErrorsCount(self):
+    errors = [EOFError(), ftplib.error_temp('421 Service not available'), 
+              smtplib.SMTPConnectError(421, 'Service not available'), 
+              smtplib.SMTPServerDisconnected('Connection unexpectedly closed'),
+              BotoServerError(503, 'Service Unavailable')]
+    for error in errors:
+      breaker = CircuitBreaker('s3://bucket', failure_threshold=1)
+      mock_destination = mock()
+      when(mock_destination).send().thenRaise(error)
+      self.assertRaises(CircuitOpenError, breaker.call, mock_destination.send)
+    
+  def testOpenKeepsCauseTraceback(self):
+    def write():
+      raise socket.error('Simulated exception')
+    self.assertRaises(socket.error, self.breaker.call, write)
+    try:
+      self.breaker.call(write)
+      self.fail('Circuit did not open')
+    except CircuitOpenError:
+      self.assertEqual('write', traceback.extract_tb(sys.exc_info()[2])[-1][2])
+    
+  def testProbeSuccessClosesCircuit(self):
+    self.open_circuit()
+    self.clock.now = 10
+    self.breaker.call(mock().send)
+    self.assertEqual(CLOSED, self.breaker.state)
+    
+  def testProbeFailureReopensCircuit(self):
+    self.open_circuit()
+    self.clock.now = 10
+    try:
+      self.breaker.call(self.mock_destination.send)
+      self.fail('Probe did not fail')
+    except CircuitOpenError as ex:
+      self.assertFalse(ex.opened)
+    verify(self.mock_destination, times=3).send()
+    self.assertEqual(OPEN, self.breaker.state)
+    self.clock.now = 15
+    self.assertRaises(CircuitOpenError, self.breaker.call, self.mock_destination.send)
+    verify(self.mock_destination, times=3).send()
+    
+  def testInterruptedProbeReleasesCircuit(self):
+    self.open_circuit()
+    self.clock.now = 10
+    mock_destination = mock()
+    when(mock_destination).send().thenRaise(KeyboardInterrupt()).thenReturn(None)
+    self.assertRaises(KeyboardInterrupt, self.breaker.call, mock_destination.send)
+    self.assertEqual(OPEN, self.breaker.state)
+    self.breaker.call(mock_destination.send)
+    self.assertEqual(CLOSED, self.breaker.state)
+    
+  def testInFlightFailureDoesNotDelayProbe(self):
+    self.assertRaises(socket.error, self.breaker.call, self.mock_destination.send)
+    in_flight = self.breaker.before_call()
+    self.assertRaises(CircuitOpenError, self.breaker.call, self.mock_destination.send)
+    self.clock.now = 5
+    self.breaker.record_failure(socket.error('Simulated exception'), in_flight)
+    self.assertEqual(0, self.breaker.opened_at)
+    self.clock.now = 10
+    self.breaker.call(mock().send)
+    self.assertEqual(CLOSED, self.breaker.state)
+
+class CircuitBreakerRegistryTests(unittest.TestCase):
+  def testBreakersAreSharedByDestination(self):
+    registry = CircuitBreakerRegistry()
+    self.assertTrue(registry.get('s3://bucket') is registry.get('s3://bucket'))
+    self.assertFalse(registry.get('s3://bucket') is registry.get('s3://other'))
+    
+  def testNoDestinationBypassesBreaker(self):
+    registry = CircuitBreakerRegistry(failure_threshold=1)
+    mock_destination = mock()
+    when(mock_destination).send().thenRaise(socket.error('Simulated exception'))
+    for _ in range(2):
+      self.assertRaises(socket.error, registry.call, None, mock_destination.send)
+    verify(mock_destination, times=2).send()
@@ -19,11 +19,17 @@
 # SOFTWARE.
 
 import logging
+import socket
 import unittest
 
-from mockito import any, mock, verify
+from mockito import any, mock, verify, when
 
+from net.ftp import FtpClient
+from net.s3 import S3Client
+from net.smtp import SmtpClient
+from system.breaker import CircuitBreakerRegistry, CircuitOpenError, OPEN
 from system.writer import FtpFileWriter, S3FileWriter
+from tests import refused_port
 
 
 class WriterTests(unittest.TestCase):
@@ -44,4 +50,37 @@ class WriterTests(unittest.TestCase):
     writer.write(mock(), {'bucket': 'test bucket', 'key': 'test key'})
     verify(mock_s3_client).connect()
     verify(mock_s3_client).write_key(any(), any(), any(), any())
-    verify(mock_s3_client).disconnect()  
+    verify(mock_s3_client).disconnect()
+
+  def testFtpFileWriterDestination(self):
+    mock_ftp_client = mock()
+    when(mock_ftp_client).destination().thenReturn('ftp://partner')
+    writer = FtpFileWriter(mock_ftp_client)
+    self.assertEqual('ftp://partner', writer.destination({'filename': 'test'}))
+
+  def testS3FileWriterDestination(self):
+    mock_s3_client = mock()
+    when(mock_s3_client).destination('test bucket').thenReturn('s3://test bucket')
+    writer = S3FileWriter(mock_s3_client)
+    self.assertEqual('s3://test bucket', writer.destination({'bucket': 'test bucket'}))
+
+  def testClientDestinations(self):
+    self.assertEqual('ftp://partner:21', FtpClient('partner').destination())
+    self.assertEqual('s3://test bucket', S3Client().destination('test bucket'))
+    self.assertEqual('smtp://relay:25', SmtpClient('relay', 25).destination())
+
+  def testFtpFileWriterConnectionRefused(self):
+    ftp_client = FtpClient('127.0.0.1', port=refused_port())
+    writer = FtpFileWriter(ftp_client)
+    registry = CircuitBreakerRegistry(failure_threshold=2)
+    destination = ftp_client.destination()
+    self.assertRaises(socket.error, registry.call, destination, writer.write, 
+        mock(), {'filename': 'test'})
+    self.assertRaises(CircuitOpenError, registry.call, destination, writer.write, 
+        mock(), {'filename': 'test'})
+    self.assertEqual(OPEN, registry.get(destination).state)
+
+  def testClientDisconnectWithoutConnection(self):
+    FtpClient('partner').disconnect()
+    S3Client().disconnect()
+    SmtpClient('relay', 25).disconnect()